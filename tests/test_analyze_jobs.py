@@ -0,0 +1,132 @@
+"""Tests for the QStash worker path of the archived Python analyzer."""
+
+import base64
+import hashlib
+import hmac
+import importlib.machinery
+import importlib.util
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+
+ANALYZE_PATH = Path(__file__).resolve().parents[1] / ".archive" / "analyze.py.backup"
+SIGNING_KEY = "sig_current"
+
+
+def _load_analyze():
+    loader = importlib.machinery.SourceFileLoader("analyze", str(ANALYZE_PATH))
+    spec = importlib.util.spec_from_loader("analyze", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+analyze = _load_analyze()
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _sign(payload: bytes, key: str = SIGNING_KEY, **claim_overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "Upstash",
+        "nbf": now - 10,
+        "exp": now + 300,
+        "body": _b64url(hashlib.sha256(payload).digest()),
+        **claim_overrides,
+    }
+    return _sign_claims(claims, key)
+
+
+def _sign_claims(claims, key: str = SIGNING_KEY) -> str:
+    header_b64 = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+    claims_b64 = _b64url(orjson.dumps(claims))
+    signing_input = f"{header_b64}.{claims_b64}".encode("utf-8")
+    signature = _b64url(hmac.new(key.encode("utf-8"), signing_input, hashlib.sha256).digest())
+    return f"{header_b64}.{claims_b64}.{signature}"
+
+
+@pytest.fixture(autouse=True)
+def signing_keys(monkeypatch):
+    monkeypatch.setenv("QSTASH_CURRENT_SIGNING_KEY", SIGNING_KEY)
+    monkeypatch.setenv("QSTASH_NEXT_SIGNING_KEY", "sig_next")
+
+
+def _worker(signature):
+    handler = analyze.handler.__new__(analyze.handler)
+    handler.headers = {"Upstash-Signature": signature} if signature else {}
+    handler.responses = []
+    handler._send_json = lambda status, payload: handler.responses.append((status, payload))
+    return handler
+
+
+def test_signature_accepts_current_and_next_keys():
+    body = b'{"url": "https://example.com", "jobId": "abc"}'
+
+    assert analyze._verify_qstash_signature(_sign(body), body)
+    assert analyze._verify_qstash_signature(_sign(body, key="sig_next"), body)
+
+
+def test_signature_rejects_tampering_and_expiry():
+    body = b'{"url": "https://example.com", "jobId": "abc"}'
+
+    assert not analyze._verify_qstash_signature(None, body)
+    assert not analyze._verify_qstash_signature("not-a-jwt", body)
+    assert not analyze._verify_qstash_signature(_sign(body, key="wrong"), body)
+    assert not analyze._verify_qstash_signature(_sign(body), b'{"url": "https://evil.test"}')
+    assert not analyze._verify_qstash_signature(_sign(body, exp=int(time.time()) - 1), body)
+    assert not analyze._verify_qstash_signature(_sign(body, iss="someone-else"), body)
+    assert not analyze._verify_qstash_signature("eyJ9.e30.\u00e9", body)
+    assert not analyze._verify_qstash_signature(_sign_claims(["not", "a", "dict"]), body)
+    assert not analyze._verify_qstash_signature(_sign(body, exp="tomorrow"), body)
+    assert not analyze._verify_qstash_signature(_sign(body, body=None), body)
+
+
+def test_unsigned_job_is_rejected(monkeypatch):
+    monkeypatch.setattr(analyze, "analyze_url", pytest.fail)
+    body = b'{"url": "https://example.com", "jobId": "abc"}'
+    worker = _worker(None)
+
+    worker._run_job(body, orjson.loads(body))
+
+    assert worker.responses == [(analyze.HTTPStatus.UNAUTHORIZED, {"message": "Invalid job signature."})]
+
+
+def test_unexpected_error_marks_job_failed_and_acknowledges(monkeypatch):
+    writes = []
+    monkeypatch.setattr(analyze, "_cache_write", lambda key, value, ttl: writes.append((key, value)))
+
+    def explode(url):
+        raise ValueError("malformed completion")
+
+    monkeypatch.setattr(analyze, "analyze_url", explode)
+    body = b'{"url": "https://example.com", "jobId": "abc"}'
+    worker = _worker(_sign(body))
+
+    worker._run_job(body, orjson.loads(body))
+
+    assert writes[-1] == (
+        "job:abc",
+        {"status": "failed", "url": "https://example.com", "error": "malformed completion"},
+    )
+    assert worker.responses == [(analyze.HTTPStatus.OK, {"jobId": "abc"})]
+
+
+def test_failed_publish_removes_queued_record(monkeypatch):
+    monkeypatch.setenv("QSTASH_TOKEN", "token")
+    monkeypatch.setenv("QSTASH_WORKER_URL", "https://auditor.test/api/analyze")
+    monkeypatch.setattr(analyze, "_cache_client", lambda: object())
+    writes, deletes = [], []
+    monkeypatch.setattr(analyze, "_cache_write", lambda key, value, ttl: writes.append(key))
+    monkeypatch.setattr(analyze, "_cache_delete", deletes.append)
+    monkeypatch.setattr(
+        analyze, "_HTTP", httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    )
+
+    assert analyze._enqueue_job("https://example.com") is None
+    assert deletes == writes